@@ -62,13 +62,11 @@ ConfigParser -- responsible for parsing a list of
         write the configuration state in .ini format
 """
 
-try:
-    from collections import OrderedDict as _default_dict
-except ImportError:
-    # fallback for setup.py which hasn't yet built _collections
-    _default_dict = dict
-
 import re
+from collections import OrderedDict as _default_dict
+from collections.abc import MutableMapping
+from typing import (IO, Any, Callable, Dict, Iterable, List, Mapping,
+                    Optional)
 
 __all__ = ["NoSectionError", "DuplicateSectionError", "NoOptionError",
             "ParsingError", "MissingSectionHeaderError",
@@ -78,26 +76,17 @@ DEFAULTSECT = "DEFAULT"
 SETUP = 'Setup'
 CONTENTBLOCK = '__Content__'
 
+# first characters that mark a line as a comment or an empty line
+_SKIP_FIRST = frozenset('#;\n')
+
+# marker for lookups that found nothing
+_MISSING = object()
+
 # exception classes
 class Error(Exception):
     """Base class for ConfigParser exceptions."""
 
-    def _get_message(self):
-        """Getter for 'message'; needed only to override deprecation in
-        BaseException."""
-        return self.__message
-
-    def _set_message(self, value):
-        """Setter for 'message'; needed only to override deprecation in
-        BaseException."""
-        self.__message = value
-
-    # BaseException.message has been deprecated since Python 2.6.  To prevent
-    # DeprecationWarning from popping up over this pre-existing attribute, use
-    # a new property that takes lookup precedence.
-    message = property(_get_message, _set_message)
-
-    def __init__(self, msg=''):
+    def __init__(self, msg: str = '') -> None:
         self.message = msg
         Exception.__init__(self, msg)
 
@@ -159,15 +148,20 @@ class MissingSectionHeaderError(ParsingError):
         self.args = (filename, lineno, line)
 
 class ConfigParser:
-    def __init__(self, defaults=None, dict_type=_default_dict,
-                 allow_no_value=False):
+    def __init__(self, defaults: Optional[Mapping[str, Any]] = None,
+                 dict_type: Callable[[], Dict[str, Any]] = _default_dict,
+                 allow_no_value: bool = False) -> None:
         self._dict = dict_type
-        self._sections = self._dict()
-        self._defaults = self._dict()
+        self._sections: Dict[str, Dict[str, Any]] = self._dict()
+        self._defaults: Dict[str, Any] = self._dict()
         if allow_no_value:
             self._optcre = self.OPTCRE_NV
         else:
             self._optcre = self.OPTCRE
+        # section header or option line in a single match, used while
+        # reading the Setup section
+        self._linecre = re.compile(
+            r'(?:%s)|(?:%s)' % (self.SECTCRE.pattern, self._optcre.pattern))
         if defaults:
             for key, value in defaults.items():
                 self._defaults[key] = value
@@ -178,9 +172,9 @@ class ConfigParser:
     def sections(self):
         """Return a list of section names, excluding [DEFAULT]"""
         # self._sections will never have [DEFAULT] in it
-        return self._sections.keys()
+        return list(self._sections)
 
-    def add_section(self, section):
+    def add_section(self, section: str) -> None:
         """Create a new section in the configuration.
 
         Raise DuplicateSectionError if a section by the specified name
@@ -188,7 +182,7 @@ class ConfigParser:
         case-insensitive variants.
         """
         if section.lower() == "default":
-            raise ValueError, 'Invalid section name: %s' % section
+            raise ValueError('Invalid section name: %s' % section)
 
         if section in self._sections:
             raise DuplicateSectionError(section)
@@ -204,13 +198,16 @@ class ConfigParser:
     def options(self, section):
         """Return a list of option names for the given section name."""
         try:
-            opts = self._sections[section].copy()
+            opts = self._sections[section]
         except KeyError:
             raise NoSectionError(section)
+        if not self._defaults:
+            # nothing to merge, skip the copy
+            return [key for key in opts if key != '__name__']
+        opts = opts.copy()
         opts.update(self._defaults)
-        if '__name__' in opts:
-            del opts['__name__']
-        return opts.keys()
+        opts.pop('__name__', None)
+        return list(opts.keys())
 
     def read(self, filenames):
         """Read and parse a filename or a list of filenames.
@@ -222,23 +219,27 @@ class ConfigParser:
         configuration files in the list will be read.  A single
         filename may also be given.
 
+        The files of one call are merged in order; each call starts
+        from an empty set of sections.
+
         Return list of successfully read files.
         """
-        if isinstance(filenames, basestring):
+        if isinstance(filenames, str):
             filenames = [filenames]
         read_ok = []
         for filename in filenames:
             try:
                 fp = open(filename)
-            except IOError:
+            except OSError:
                 continue
-            self._sections = self._dict()
+            if not read_ok:
+                self._sections = self._dict()
             self._read(fp, filename)
             fp.close()
             read_ok.append(filename)
         return read_ok
 
-    def get(self, section, option):
+    def get(self, section: str, option: str) -> Any:
         opt = option
         if section not in self._sections:
             if section != DEFAULTSECT:
@@ -261,11 +262,14 @@ class ConfigParser:
             if section != DEFAULTSECT:
                 raise NoSectionError(section)
             d2 = self._dict()
+        if not self._defaults:
+            # nothing to merge, skip the copy
+            return [(key, value) for key, value in d2.items()
+                    if key != "__name__"]
         d = self._defaults.copy()
         d.update(d2)
-        if "__name__" in d:
-            del d["__name__"]
-        return d.items()
+        d.pop("__name__", None)
+        return list(d.items())
 
 #    def _get(self, section, conv, option):
 #        return conv(self.get(section, option))
@@ -286,7 +290,7 @@ class ConfigParser:
             return (option in self._sections[section]
                     or option in self._defaults)
 
-    def set(self, section, option, value=None):
+    def set(self, section: str, option: str, value: Any = None) -> None:
         """Set an option."""
         if not section or section == DEFAULTSECT:
             sectdict = self._defaults
@@ -297,25 +301,27 @@ class ConfigParser:
                 raise NoSectionError(section)
         sectdict[option] = value
 
-    def write(self, fp):
+    def write(self, fp: IO[str]) -> None:
         """Write an .ini-format representation of the configuration state."""
+        out: List[str] = []
+        allow_none = self._optcre is not self.OPTCRE
         if self._defaults:
-            fp.write("[%s]\n" % DEFAULTSECT)
+            out.append("[%s]\n" % DEFAULTSECT)
             for (key, value) in self._defaults.items():
-                fp.write("%s = %s\n" % (key, str(value).replace('\n', '\n\t')))
-            fp.write("\n")
+                out.append("%s = %s\n" % (key, str(value).replace('\n', '\n\t')))
+            out.append("\n")
         for section in self._sections:
-            fp.write("[%s]\n" % section)
+            out.append("[%s]\n" % section)
             for (key, value) in self._sections[section].items():
                 if key == "__name__":
                     continue
                 if key == CONTENTBLOCK and section != SETUP:
-                    key = value
-                    fp.write("%s" % (key))
-                elif (value is not None) or (self._optcre == self.OPTCRE):
-                    key = "=".join((key, str(value).replace('\n', '\n\t')))
-                    fp.write("%s\n" % (key))
-            #fp.write("\n")
+                    out.append("%s" % (value))
+                elif (value is not None) or not allow_none:
+                    value = str(value).replace('\n', '\n\t')
+                    out.append("%s=%s\n" % (key, value))
+            #out.append("\n")
+        fp.write(''.join(out))
 
     def remove_option(self, section, option):
         """Remove an option."""
@@ -326,17 +332,11 @@ class ConfigParser:
                 sectdict = self._sections[section]
             except KeyError:
                 raise NoSectionError(section)
-        existed = option in sectdict
-        if existed:
-            del sectdict[option]
-        return existed
+        return sectdict.pop(option, _MISSING) is not _MISSING
 
     def remove_section(self, section):
         """Remove a file section."""
-        existed = section in self._sections
-        if existed:
-            del self._sections[section]
-        return existed
+        return self._sections.pop(section, _MISSING) is not _MISSING
 
     #
     # Regular expressions for parsing section headers and options.
@@ -364,7 +364,7 @@ class ConfigParser:
         r'(?P<value>.*))?$'                   # everything up to eol
         )
 
-    def _read(self, fp, fpname):
+    def _read(self, fp: Iterable[str], fpname: str) -> None:
         """Parse a sectioned setup file.
 
         The sections in setup file contains a title line at the top,
@@ -374,53 +374,87 @@ class ConfigParser:
         leading whitespace.  Blank lines, lines beginning with a '#',
         and just about everything else are ignored.
         """
-        cursect = None                        # None, or a dictionary
-        optname = None
-        lineno = 0
-        e = None                              # None, or an exception
-        while True:
-            line = fp.readline()
-            if not line:
-                break
-            lineno = lineno + 1
+        sect_match = self.SECTCRE.match
+        setup_match = self._linecre.match
+        line_match = sect_match
+        sections = self._sections
+        defaults = self._defaults
+        dict_type = self._dict
+        cursect: Optional[Dict[str, Any]] = None
+        in_options = False                    # Setup or DEFAULT section
+        content: Optional[List[str]] = None   # content lines of cursect
+        optname: Optional[str] = None
+        optval: Optional[str]
+        e: Optional[ParsingError] = None
+        for lineno, line in enumerate(fp, 1):
             # comment or blank line?
-            if line.strip() == '' or line[0] in '#;':
-                if cursect is None or cursect['__name__'] == SETUP:
+            c0 = line[0]
+            indented = c0.isspace()
+            if indented:
+                # only lines with leading whitespace can be blank or be
+                # continuations; both need the stripped text
+                value = line.strip()
+            if c0 in _SKIP_FIRST or (indented and not value):
+                if cursect is None or in_options:
                     continue
-            elif line.split(None, 1)[0].lower() == 'rem' and line[0] in "rR":
-                # no leading whitespace
+            elif (c0 in "rR" and line[1:3].lower() == 'em'
+                  and (len(line) == 3 or line[3].isspace())):
+                # 'rem' as the first word, no leading whitespace
                 continue
             # continuation line?
-            if line[0].isspace() and cursect is not None and optname:
-                value = line.strip()
+            if indented and cursect is not None and optname:
                 if value:
-                    cursect[optname].append(value)
+                    # single-line values are kept as plain strings
+                    cur = cursect[optname]
+                    if isinstance(cur, list):
+                        cur.append(value)
+                    else:
+                        cursect[optname] = [cur, value]
             # a section header or option header?
             else:
-                # is it a section header?
-                mo = self.SECTCRE.match(line)
-                if mo:
-                    sectname = mo.group('header')
-                    if sectname in self._sections:
-                        cursect = self._sections[sectname]
+                # is it a section header?  Outside of the Setup and DEFAULT
+                # sections only headers matter, inside them the same match
+                # also parses the option line.
+                mo = line_match(line)
+                sectname = mo.group('header') if mo else None
+                if sectname:
+                    if sectname in sections:
+                        cursect = sections[sectname]
                     elif sectname == DEFAULTSECT:
-                        cursect = self._defaults
+                        cursect = defaults
                     else:
-                        cursect = self._dict()
+                        cursect = dict_type()
                         cursect['__name__'] = sectname
-                        self._sections[sectname] = cursect
+                        sections[sectname] = cursect
+                    in_options = sectname == SETUP or sectname == DEFAULTSECT
+                    content = None
                     # So sections can't start with a continuation line
                     optname = None
+                    if in_options:
+                        line_match = setup_match
+                    else:
+                        line_match = sect_match
                 # no section header in the file?
                 elif cursect is None:
                     raise MissingSectionHeaderError(fpname, lineno, line)
-                elif cursect['__name__'] != SETUP:
+                elif not in_options:
                     #code = cursect.get('code', [])
                     #cursect['code'] = code.append(line)
-                    cursect[CONTENTBLOCK] = cursect.get(CONTENTBLOCK, '') + line
+                    if content is None:
+                        block = cursect.get(CONTENTBLOCK)
+                        if block is None:
+                            content = cursect[CONTENTBLOCK] = []
+                        elif isinstance(block, list):
+                            content = block
+                        else:
+                            # block joined by an earlier file; keep adding
+                            # on a line of its own
+                            if block and not block.endswith('\n'):
+                                block += '\n'
+                            content = cursect[CONTENTBLOCK] = [block]
+                    content.append(line)
                 # an option line?
                 else:
-                    mo = self._optcre.match(line)
                     if mo:
                         optname, vi, optval = mo.group('option', 'vi', 'value')
                         optname = optname.rstrip()
@@ -437,7 +471,7 @@ class ConfigParser:
                             # allow empty values
                             if optval == '""':
                                 optval = ''
-                            cursect[optname] = [optval]
+                            cursect[optname] = optval
                         else:
                             # valueless option handling
                             cursect[optname] = optval
@@ -449,27 +483,32 @@ class ConfigParser:
                         if not e:
                             e = ParsingError(fpname)
                         e.append(lineno, repr(line))
-        # if any parsing errors occurred, raise an exception
-        if e:
-            raise e
-
         # join the multi-line values collected while reading
-        all_sections = [self._defaults]
-        all_sections.extend(self._sections.values())
+        all_sections = [defaults]
+        all_sections.extend(sections.values())
         for options in all_sections:
             for name, val in options.items():
                 if isinstance(val, list):
-                    options[name] = '\n'.join(val)
+                    if name == CONTENTBLOCK:
+                        # content lines keep their own line endings
+                        options[name] = ''.join(val)
+                    else:
+                        options[name] = '\n'.join(val)
 
-import UserDict as _UserDict
+        # if any parsing errors occurred, raise an exception; the values
+        # read so far are joined above so the parser stays usable
+        if e:
+            raise e
 
-class _Chainmap(_UserDict.DictMixin):
+class _Chainmap(MutableMapping):
     """Combine multiple mappings for successive lookups.
 
     For example, to emulate Python's normal lookup sequence:
 
-        import __builtin__
-        pylookup = _Chainmap(locals(), globals(), vars(__builtin__))
+        import builtins
+        pylookup = _Chainmap(locals(), globals(), vars(builtins))
+
+    Updates and deletions only affect the first mapping.
     """
 
     def __init__(self, *maps):
@@ -477,45 +516,31 @@ class _Chainmap(_UserDict.DictMixin):
 
     def __getitem__(self, key):
         for mapping in self._maps:
-            try:
-                return mapping[key]
-            except KeyError:
-                pass
+            value = mapping.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
         raise KeyError(key)
 
-    def keys(self):
-        result = []
-        seen = set()
-        for mapping in self._maps:
-            for key in mapping:
-                if key not in seen:
-                    result.append(key)
-                    seen.add(key)
-        return result
+    def __setitem__(self, key, value):
+        self._maps[0][key] = value
 
+    def __delitem__(self, key):
+        del self._maps[0][key]
 
-    def get(self, section, option):
-        """Get an option value for a given section.
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        # merge from the back so the first mapping holding a key wins,
+        # as in __getitem__
+        merged = {}
+        for mapping in reversed(self._maps):
+            merged.update(mapping)
+        return list(merged)
 
-        The section DEFAULT is special.
-        """
-        sectiondict = {}
-        try:
-            sectiondict = self._sections[section]
-        except KeyError:
-            if section != DEFAULTSECT:
-                raise NoSectionError(section)
-        # Update with the entry specific variables
-        vardict = {}
-        if vars:
-            for key, value in vars.items():
-                vardict[key] = value
-        d = _Chainmap(vardict, sectiondict, self._defaults)
-        try:
-            value = d[option]
-        except KeyError:
-            raise NoOptionError(option, section)
-        return value
 
 class ISSParser(ConfigParser):
     def getSetupOption(self, key):
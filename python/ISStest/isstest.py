@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # coding=utf-8
-from iss import ISSParser, CONTENTBLOCK
+import io
+import os
+import tempfile
+from iss import ISSParser, ParsingError, CONTENTBLOCK
 parser = ISSParser()
 fp = parser.read("Update.iss")
 files = parser.getFiles()
@@ -11,23 +14,71 @@ parser.setFiles(out)
 parser.writefile("test1.iss")
 
 fp = parser.read("Update.iss")
-print parser.get('Setup', 'DefaultDirName')
+print(parser.get('Setup', 'DefaultDirName'))
 parser.set('Setup', 'AppSupportURL', 'www.alcatel.com')
-print parser.get('Dirs', CONTENTBLOCK)
+print(parser.get('Dirs', CONTENTBLOCK))
 files = parser.get('Files', CONTENTBLOCK)
-print files
+print(files)
 out = files.replace('Source', 'From')
 parser.set('Files', CONTENTBLOCK, out)
-print parser.get('Languages', CONTENTBLOCK)
-print parser.get('Registry', CONTENTBLOCK)
-print parser.get('Tasks', CONTENTBLOCK)
-print parser.get('Run', CONTENTBLOCK)
-print parser.get('UninstallRun', CONTENTBLOCK)
-#print parser.get('InstallDelete', CONTENTBLOCK)
-print parser.get('UninstallDelete', CONTENTBLOCK)
-print parser.get('Icons', CONTENTBLOCK)
-print parser.get('Code', CONTENTBLOCK)
+print(parser.get('Languages', CONTENTBLOCK))
+print(parser.get('Registry', CONTENTBLOCK))
+print(parser.get('Tasks', CONTENTBLOCK))
+print(parser.get('Run', CONTENTBLOCK))
+print(parser.get('UninstallRun', CONTENTBLOCK))
+#print(parser.get('InstallDelete', CONTENTBLOCK))
+print(parser.get('UninstallDelete', CONTENTBLOCK))
+print(parser.get('Icons', CONTENTBLOCK))
+print(parser.get('Code', CONTENTBLOCK))
 
 with open("test.iss", 'w') as fp:
     parser.write(fp)
 
+
+# the files of one read() call are merged into the same sections
+tmpdir = tempfile.mkdtemp()
+first = os.path.join(tmpdir, 'a.iss')
+second = os.path.join(tmpdir, 'b.iss')
+with open(first, 'w') as fp:
+    fp.write('[Setup]\nAppName=a\n[Files]\nSource: a')
+with open(second, 'w') as fp:
+    fp.write('[Setup]\nAppId=b\n[Files]\nSource: b\n')
+parser = ISSParser()
+assert parser.read([first, second]) == [first, second]
+assert parser.getSetupOption('AppName') == 'a'
+assert parser.getSetupOption('AppId') == 'b'
+assert parser.getFiles() == 'Source: a\nSource: b\n'
+# a new call starts over
+parser.read(second)
+assert not parser.has_option('Setup', 'AppName')
+assert parser.getFiles() == 'Source: b\n'
+
+# [DEFAULT] holds options, like [Setup]
+defaults = os.path.join(tmpdir, 'defaults.iss')
+with open(defaults, 'w') as fp:
+    fp.write('[DEFAULT]\nAppName=x\n[Setup]\nA=1\n[Files]\n')
+parser = ISSParser()
+parser.read(defaults)
+assert parser.defaults() == {'AppName': 'x'}
+assert not parser.has_option('Files', CONTENTBLOCK)
+assert list(parser.options('Setup')) == ['A', 'AppName']
+out = io.StringIO()
+parser.write(out)
+assert out.getvalue() == '[DEFAULT]\nAppName = x\n\n[Setup]\nA=1\n[Files]\n'
+
+# values read before a parsing error are still joined
+broken = os.path.join(tmpdir, 'broken.iss')
+with open(broken, 'w') as fp:
+    fp.write('[Files]\nSource: a\n[Setup]\nbad\n')
+parser = ISSParser()
+try:
+    parser.read(broken)
+except ParsingError:
+    pass
+else:
+    raise AssertionError('ParsingError not raised')
+assert parser.getFiles() == 'Source: a\n'
+
+for name in os.listdir(tmpdir):
+    os.remove(os.path.join(tmpdir, name))
+os.rmdir(tmpdir)